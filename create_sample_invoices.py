@@ -4,15 +4,19 @@ import json
 from datetime import datetime, timedelta
 
 BASE_URL = "http://localhost:8000/api"
+# Seconds to wait for the backend, so a hung server fails the run instead of blocking it
+REQUEST_TIMEOUT = 10
 
 def create_invoice(invoice_data):
     """Create an invoice via API."""
     try:
-        response = requests.post(f"{BASE_URL}/invoices/create", json=invoice_data)
+        response = requests.post(f"{BASE_URL}/invoices/create", json=invoice_data, timeout=REQUEST_TIMEOUT)
         response.raise_for_status()
         invoice = response.json()
         print(f"✓ Created invoice: {invoice['parsed_data']['invoice_number']} - ${invoice['parsed_data']['total_amount']:.2f}")
         return invoice
+    except (requests.exceptions.ConnectionError, requests.exceptions.Timeout):
+        raise
     except Exception as e:
         print(f"✗ Error creating invoice: {e}")
         return None
@@ -34,20 +38,9 @@ def main():
     print("=" * 60)
     print()
     
-    # Check if server is running
-    try:
-        response = requests.get(f"{BASE_URL.replace('/api', '')}/health", timeout=2)
-        if response.status_code != 200:
-            print("⚠️  Backend server is not running!")
-            print("Please start the server first: python run.py")
-            return
-    except:
-        print("⚠️  Backend server is not running!")
-        print("Please start the server first: python run.py")
-        return
-    
     vendor_name = "ABC Supplies Co."
-    base_date = datetime.now() - timedelta(days=30)
+    now = datetime.now()
+    base_date = now - timedelta(days=30)
     
     # Normal invoices (5 invoices with similar but slightly different details)
     print("\n📄 Creating 5 Normal Invoices (Same Supplier)...")
@@ -55,120 +48,126 @@ def main():
     
     normal_invoices = []
     
-    # Invoice 1 - Normal
-    invoice1 = create_invoice({
-        "vendor_name": vendor_name,
-        "invoice_number": "INV-2024-001",
-        "invoice_date": (base_date + timedelta(days=1)).isoformat(),
-        "total_amount": 1250.00,
-        "items": [
-            {"name": "Office Chairs", "quantity": 5.0, "unit_price": 150.0, "total_price": 750.0},
-            {"name": "Desk Lamps", "quantity": 10.0, "unit_price": 50.0, "total_price": 500.0}
-        ],
-        "currency": "USD"
-    })
-    if invoice1:
-        normal_invoices.append(invoice1)
+    # The server being down, or going away mid-run, stops the whole sequence
+    try:
+        # Invoice 1 - Normal
+        invoice1 = create_invoice({
+            "vendor_name": vendor_name,
+            "invoice_number": "INV-2024-001",
+            "invoice_date": (base_date + timedelta(days=1)).isoformat(),
+            "total_amount": 1250.00,
+            "items": [
+                {"name": "Office Chairs", "quantity": 5.0, "unit_price": 150.0, "total_price": 750.0},
+                {"name": "Desk Lamps", "quantity": 10.0, "unit_price": 50.0, "total_price": 500.0}
+            ],
+            "currency": "USD"
+        })
+        if invoice1:
+            normal_invoices.append(invoice1)
     
-    # Invoice 2 - Normal (slightly different quantities)
-    invoice2 = create_invoice({
-        "vendor_name": vendor_name,
-        "invoice_number": "INV-2024-002",
-        "invoice_date": (base_date + timedelta(days=5)).isoformat(),
-        "total_amount": 1300.00,
-        "items": [
-            {"name": "Office Chairs", "quantity": 6.0, "unit_price": 150.0, "total_price": 900.0},
-            {"name": "Desk Lamps", "quantity": 8.0, "unit_price": 50.0, "total_price": 400.0}
-        ],
-        "currency": "USD"
-    })
-    if invoice2:
-        normal_invoices.append(invoice2)
+        # Invoice 2 - Normal (slightly different quantities)
+        invoice2 = create_invoice({
+            "vendor_name": vendor_name,
+            "invoice_number": "INV-2024-002",
+            "invoice_date": (base_date + timedelta(days=5)).isoformat(),
+            "total_amount": 1300.00,
+            "items": [
+                {"name": "Office Chairs", "quantity": 6.0, "unit_price": 150.0, "total_price": 900.0},
+                {"name": "Desk Lamps", "quantity": 8.0, "unit_price": 50.0, "total_price": 400.0}
+            ],
+            "currency": "USD"
+        })
+        if invoice2:
+            normal_invoices.append(invoice2)
     
-    # Invoice 3 - Normal
-    invoice3 = create_invoice({
-        "vendor_name": vendor_name,
-        "invoice_number": "INV-2024-003",
-        "invoice_date": (base_date + timedelta(days=10)).isoformat(),
-        "total_amount": 1200.00,
-        "items": [
-            {"name": "Office Chairs", "quantity": 4.0, "unit_price": 150.0, "total_price": 600.0},
-            {"name": "Desk Lamps", "quantity": 12.0, "unit_price": 50.0, "total_price": 600.0}
-        ],
-        "currency": "USD"
-    })
-    if invoice3:
-        normal_invoices.append(invoice3)
+        # Invoice 3 - Normal
+        invoice3 = create_invoice({
+            "vendor_name": vendor_name,
+            "invoice_number": "INV-2024-003",
+            "invoice_date": (base_date + timedelta(days=10)).isoformat(),
+            "total_amount": 1200.00,
+            "items": [
+                {"name": "Office Chairs", "quantity": 4.0, "unit_price": 150.0, "total_price": 600.0},
+                {"name": "Desk Lamps", "quantity": 12.0, "unit_price": 50.0, "total_price": 600.0}
+            ],
+            "currency": "USD"
+        })
+        if invoice3:
+            normal_invoices.append(invoice3)
     
-    # Invoice 4 - Normal
-    invoice4 = create_invoice({
-        "vendor_name": vendor_name,
-        "invoice_number": "INV-2024-004",
-        "invoice_date": (base_date + timedelta(days=15)).isoformat(),
-        "total_amount": 1275.00,
-        "items": [
-            {"name": "Office Chairs", "quantity": 5.0, "unit_price": 150.0, "total_price": 750.0},
-            {"name": "Desk Lamps", "quantity": 10.5, "unit_price": 50.0, "total_price": 525.0}
-        ],
-        "currency": "USD"
-    })
-    if invoice4:
-        normal_invoices.append(invoice4)
+        # Invoice 4 - Normal
+        invoice4 = create_invoice({
+            "vendor_name": vendor_name,
+            "invoice_number": "INV-2024-004",
+            "invoice_date": (base_date + timedelta(days=15)).isoformat(),
+            "total_amount": 1275.00,
+            "items": [
+                {"name": "Office Chairs", "quantity": 5.0, "unit_price": 150.0, "total_price": 750.0},
+                {"name": "Desk Lamps", "quantity": 10.5, "unit_price": 50.0, "total_price": 525.0}
+            ],
+            "currency": "USD"
+        })
+        if invoice4:
+            normal_invoices.append(invoice4)
     
-    # Invoice 5 - Normal
-    invoice5 = create_invoice({
-        "vendor_name": vendor_name,
-        "invoice_number": "INV-2024-005",
-        "invoice_date": (base_date + timedelta(days=20)).isoformat(),
-        "total_amount": 1280.00,
-        "items": [
-            {"name": "Office Chairs", "quantity": 5.0, "unit_price": 150.0, "total_price": 750.0},
-            {"name": "Desk Lamps", "quantity": 10.6, "unit_price": 50.0, "total_price": 530.0}
-        ],
-        "currency": "USD"
-    })
-    if invoice5:
-        normal_invoices.append(invoice5)
+        # Invoice 5 - Normal
+        invoice5 = create_invoice({
+            "vendor_name": vendor_name,
+            "invoice_number": "INV-2024-005",
+            "invoice_date": (base_date + timedelta(days=20)).isoformat(),
+            "total_amount": 1280.00,
+            "items": [
+                {"name": "Office Chairs", "quantity": 5.0, "unit_price": 150.0, "total_price": 750.0},
+                {"name": "Desk Lamps", "quantity": 10.6, "unit_price": 50.0, "total_price": 530.0}
+            ],
+            "currency": "USD"
+        })
+        if invoice5:
+            normal_invoices.append(invoice5)
     
-    print(f"\n✓ Created {len(normal_invoices)} normal invoices")
+        print(f"\n✓ Created {len(normal_invoices)} normal invoices")
     
-    # Anomalous Invoice (6th invoice with multiple anomalies)
-    print("\n⚠️  Creating Anomalous Invoice (Should Trigger Alerts)...")
-    print("-" * 60)
+        # Anomalous Invoice (6th invoice with multiple anomalies)
+        print("\n⚠️  Creating Anomalous Invoice (Should Trigger Alerts)...")
+        print("-" * 60)
     
-    anomalous_invoice = create_invoice({
-        "vendor_name": vendor_name,
-        "invoice_number": "INV-2024-006",
-        "invoice_date": datetime.now().isoformat(),
-        "total_amount": 3500.00,  # Much higher than normal (~1250)
-        "items": [
-            {"name": "Office Chairs", "quantity": 5.0, "unit_price": 250.0, "total_price": 1250.0},  # Price increased from 150 to 250 (67% increase)
-            {"name": "Desk Lamps", "quantity": 25.0, "unit_price": 50.0, "total_price": 1250.0},  # Quantity much higher (normal is ~10)
-            {"name": "Premium Monitor Stand", "quantity": 5.0, "unit_price": 200.0, "total_price": 1000.0}  # New item never seen before
-        ],
-        "currency": "USD"
-    })
+        anomalous_invoice = create_invoice({
+            "vendor_name": vendor_name,
+            "invoice_number": "INV-2024-006",
+            "invoice_date": now.isoformat(),
+            "total_amount": 3500.00,  # Much higher than normal (~1250)
+            "items": [
+                {"name": "Office Chairs", "quantity": 5.0, "unit_price": 250.0, "total_price": 1250.0},  # Price increased from 150 to 250 (67% increase)
+                {"name": "Desk Lamps", "quantity": 25.0, "unit_price": 50.0, "total_price": 1250.0},  # Quantity much higher (normal is ~10)
+                {"name": "Premium Monitor Stand", "quantity": 5.0, "unit_price": 200.0, "total_price": 1000.0}  # New item never seen before
+            ],
+            "currency": "USD"
+        })
     
-    if anomalous_invoice:
-        print("\n🔍 Analyzing Anomalous Invoice...")
-        analysis = analyze_invoice(anomalous_invoice['id'])
+        if anomalous_invoice:
+            print("\n🔍 Analyzing Anomalous Invoice...")
+            analysis = analyze_invoice(anomalous_invoice['id'])
         
-        if analysis:
-            print(f"\n📊 Analysis Results:")
-            print(f"   Risk Score: {analysis['risk_score']}/100")
-            print(f"   Suspicious: {'⚠️ YES' if analysis['is_suspicious'] else '✓ NO'}")
-            print(f"   Anomalies Detected: {len(analysis['anomalies'])}")
-            print(f"\n   Explanation:")
-            for line in analysis['explanation'].split('\n'):
-                print(f"   {line}")
+            if analysis:
+                print(f"\n📊 Analysis Results:")
+                print(f"   Risk Score: {analysis['risk_score']}/100")
+                print(f"   Suspicious: {'⚠️ YES' if analysis['is_suspicious'] else '✓ NO'}")
+                print(f"   Anomalies Detected: {len(analysis['anomalies'])}")
+                print(f"\n   Explanation:")
+                for line in analysis['explanation'].split('\n'):
+                    print(f"   {line}")
             
-            if analysis['anomalies']:
-                print(f"\n   Detected Anomalies:")
-                for i, anomaly in enumerate(analysis['anomalies'], 1):
-                    print(f"   {i}. {anomaly['type'].replace('_', ' ').title()}")
-                    if anomaly.get('item_name'):
-                        print(f"      Item: {anomaly['item_name']}")
-                    print(f"      {anomaly['description']}")
+                if analysis['anomalies']:
+                    print(f"\n   Detected Anomalies:")
+                    for i, anomaly in enumerate(analysis['anomalies'], 1):
+                        print(f"   {i}. {anomaly['type'].replace('_', ' ').title()}")
+                        if anomaly.get('item_name'):
+                            print(f"      Item: {anomaly['item_name']}")
+                        print(f"      {anomaly['description']}")
+    except (requests.exceptions.ConnectionError, requests.exceptions.Timeout):
+        print("\n⚠️  Backend server is not running!")
+        print("Please start the server first: python run.py")
+        return
     
     print("\n" + "=" * 60)
     print("✅ Sample invoices created successfully!")
@@ -5,18 +5,91 @@ from reportlab.lib.units import inch
 from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
 from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.lib.enums import TA_CENTER, TA_RIGHT, TA_LEFT
+import io
 import json
+import os
 from pathlib import Path
 from datetime import datetime
 
+# Colors (parsed once at import)
+BLUE = colors.HexColor('#2490ef')
+NAVY = colors.HexColor('#2c3e50')
+GRAY = colors.HexColor('#6c757d')
+DARK = colors.HexColor('#212529')
+LIGHT = colors.HexColor('#f8f9fa')
+BORDER = colors.HexColor('#dee2e6')
+RED = colors.HexColor('#dc3545')
+
+# TableStyle commands for the invoice details table
+INFO_STYLE_CMDS = (
+    ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
+    ('FONTNAME', (1, 0), (1, -1), 'Helvetica'),
+    ('FONTSIZE', (0, 0), (-1, -1), 11),
+    ('TEXTCOLOR', (0, 0), (0, -1), GRAY),
+    ('TEXTCOLOR', (1, 0), (1, -1), DARK),
+    ('ALIGN', (0, 0), (0, -1), 'LEFT'),
+    ('ALIGN', (1, 0), (1, -1), 'LEFT'),
+    ('VALIGN', (0, 0), (-1, -1), 'TOP'),
+    ('BOTTOMPADDING', (0, 0), (-1, -1), 8),
+    ('TOPPADDING', (0, 0), (-1, -1), 8),
+)
+
+# TableStyle commands for the items table
+ITEMS_STYLE_CMDS = (
+    # Header row
+    ('BACKGROUND', (0, 0), (-1, 0), LIGHT),
+    ('TEXTCOLOR', (0, 0), (-1, 0), DARK),
+    ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+    ('FONTSIZE', (0, 0), (-1, 0), 10),
+    ('ALIGN', (0, 0), (-1, 0), 'CENTER'),
+    ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+    ('TOPPADDING', (0, 0), (-1, 0), 12),
+
+    # Data rows
+    ('FONTNAME', (0, 1), (-1, -2), 'Helvetica'),
+    ('FONTSIZE', (0, 1), (-1, -2), 10),
+    ('TEXTCOLOR', (0, 1), (-1, -2), DARK),
+    ('ALIGN', (0, 1), (0, -2), 'LEFT'),  # Item name left
+    ('ALIGN', (1, 1), (-1, -2), 'RIGHT'),  # Numbers right
+    ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+    ('BOTTOMPADDING', (0, 1), (-1, -2), 10),
+    ('TOPPADDING', (0, 1), (-1, -2), 10),
+    ('GRID', (0, 0), (-1, -2), 1, BORDER),
+
+    # Total row
+    ('FONTNAME', (0, -1), (-1, -1), 'Helvetica-Bold'),
+    ('FONTSIZE', (0, -1), (-1, -1), 12),
+    ('TEXTCOLOR', (0, -1), (-1, -1), DARK),
+    ('ALIGN', (0, -1), (2, -1), 'RIGHT'),
+    ('ALIGN', (-1, -1), (-1, -1), 'RIGHT'),
+    ('BACKGROUND', (0, -1), (-1, -1), LIGHT),
+    ('TOPPADDING', (0, -1), (-1, -1), 12),
+    ('BOTTOMPADDING', (0, -1), (-1, -1), 12),
+    ('LINEABOVE', (0, -1), (-1, -1), 2, BLUE),
+)
+
+
+def _format_quantity(qty):
+    """Show quantity as an integer if it's a whole number, otherwise with decimals."""
+    int_qty = int(qty)
+    return str(int_qty) if int_qty == qty else f"{qty:.2f}"
+
+
 def create_pdf_invoice(json_file_path, output_path):
     """Create a PDF invoice from JSON data."""
     # Load JSON data
-    with open(json_file_path, 'r') as f:
-        invoice_data = json.load(f)
-    
-    # Create PDF
-    doc = SimpleDocTemplate(str(output_path), pagesize=letter)
+    invoice_data = json.loads(Path(json_file_path).read_bytes())
+    
+    # Create PDF (rendered in memory, written to disk in one go)
+    buffer = io.BytesIO()
+    doc = SimpleDocTemplate(
+        buffer,
+        pagesize=letter,
+        pageCompression=1,
+        invariant=1,
+        title=invoice_data['invoice_number'],
+        author=invoice_data['vendor_name'],
+    )
     story = []
     styles = getSampleStyleSheet()
     
@@ -25,7 +98,7 @@ def create_pdf_invoice(json_file_path, output_path):
         'CustomTitle',
         parent=styles['Heading1'],
         fontSize=24,
-        textColor=colors.HexColor('#2490ef'),
+        textColor=BLUE,
         spaceAfter=30,
         alignment=TA_CENTER
     )
@@ -34,7 +107,7 @@ def create_pdf_invoice(json_file_path, output_path):
         'CustomHeading',
         parent=styles['Heading2'],
         fontSize=14,
-        textColor=colors.HexColor('#2c3e50'),
+        textColor=NAVY,
         spaceAfter=12
     )
     
@@ -43,25 +116,15 @@ def create_pdf_invoice(json_file_path, output_path):
     story.append(Spacer(1, 0.3*inch))
     
     # Invoice details table
+    date_str = datetime.fromisoformat(invoice_data['invoice_date']).strftime('%B %d, %Y')
     invoice_info = [
         ['Invoice Number:', invoice_data['invoice_number']],
-        ['Invoice Date:', datetime.fromisoformat(invoice_data['invoice_date']).strftime('%B %d, %Y')],
+        ['Invoice Date:', date_str],
         ['Vendor:', invoice_data['vendor_name']],
     ]
     
     info_table = Table(invoice_info, colWidths=[2*inch, 4*inch])
-    info_table.setStyle(TableStyle([
-        ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
-        ('FONTNAME', (1, 0), (1, -1), 'Helvetica'),
-        ('FONTSIZE', (0, 0), (-1, -1), 11),
-        ('TEXTCOLOR', (0, 0), (0, -1), colors.HexColor('#6c757d')),
-        ('TEXTCOLOR', (1, 0), (1, -1), colors.HexColor('#212529')),
-        ('ALIGN', (0, 0), (0, -1), 'LEFT'),
-        ('ALIGN', (1, 0), (1, -1), 'LEFT'),
-        ('VALIGN', (0, 0), (-1, -1), 'TOP'),
-        ('BOTTOMPADDING', (0, 0), (-1, -1), 8),
-        ('TOPPADDING', (0, 0), (-1, -1), 8),
-    ]))
+    info_table.setStyle(TableStyle(INFO_STYLE_CMDS))
     
     story.append(info_table)
     story.append(Spacer(1, 0.4*inch))
@@ -70,59 +133,16 @@ def create_pdf_invoice(json_file_path, output_path):
     story.append(Paragraph("Items", heading_style))
     
     # Table data
-    table_data = [['Item Name', 'Quantity', 'Unit Price', 'Total']]
-    
-    for item in invoice_data['items']:
-        # Format quantity - show as integer if it's a whole number, otherwise show decimals
-        qty = item['quantity']
-        if qty == int(qty):
-            qty_str = f"{int(qty)}"
-        else:
-            qty_str = f"{qty:.2f}"
-        
-        table_data.append([
-            item['name'],
-            qty_str,
-            f"${item['unit_price']:.2f}",
-            f"${item['total_price']:.2f}"
-        ])
-    
-    # Add total row
-    table_data.append(['', '', 'TOTAL:', f"${invoice_data['total_amount']:.2f}"])
+    header = ('Item Name', 'Quantity', 'Unit Price', 'Total')
+    body = [
+        (item['name'], _format_quantity(item['quantity']), f"${item['unit_price']:.2f}", f"${item['total_price']:.2f}")
+        for item in invoice_data['items']
+    ]
+    total = ('', '', 'TOTAL:', f"${invoice_data['total_amount']:.2f}")
+    table_data = [header, *body, total]
     
     items_table = Table(table_data, colWidths=[3.5*inch, 1*inch, 1.2*inch, 1.3*inch])
-    items_table.setStyle(TableStyle([
-        # Header row
-        ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#f8f9fa')),
-        ('TEXTCOLOR', (0, 0), (-1, 0), colors.HexColor('#212529')),
-        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-        ('FONTSIZE', (0, 0), (-1, 0), 10),
-        ('ALIGN', (0, 0), (-1, 0), 'CENTER'),
-        ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-        ('TOPPADDING', (0, 0), (-1, 0), 12),
-        
-        # Data rows
-        ('FONTNAME', (0, 1), (-1, -2), 'Helvetica'),
-        ('FONTSIZE', (0, 1), (-1, -2), 10),
-        ('TEXTCOLOR', (0, 1), (-1, -2), colors.HexColor('#212529')),
-        ('ALIGN', (0, 1), (0, -2), 'LEFT'),  # Item name left
-        ('ALIGN', (1, 1), (-1, -2), 'RIGHT'),  # Numbers right
-        ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-        ('BOTTOMPADDING', (0, 1), (-1, -2), 10),
-        ('TOPPADDING', (0, 1), (-1, -2), 10),
-        ('GRID', (0, 0), (-1, -2), 1, colors.HexColor('#dee2e6')),
-        
-        # Total row
-        ('FONTNAME', (0, -1), (-1, -1), 'Helvetica-Bold'),
-        ('FONTSIZE', (0, -1), (-1, -1), 12),
-        ('TEXTCOLOR', (0, -1), (-1, -1), colors.HexColor('#212529')),
-        ('ALIGN', (0, -1), (2, -1), 'RIGHT'),
-        ('ALIGN', (-1, -1), (-1, -1), 'RIGHT'),
-        ('BACKGROUND', (0, -1), (-1, -1), colors.HexColor('#f8f9fa')),
-        ('TOPPADDING', (0, -1), (-1, -1), 12),
-        ('BOTTOMPADDING', (0, -1), (-1, -1), 12),
-        ('LINEABOVE', (0, -1), (-1, -1), 2, colors.HexColor('#2490ef')),
-    ]))
+    items_table.setStyle(TableStyle(ITEMS_STYLE_CMDS))
     
     story.append(items_table)
     story.append(Spacer(1, 0.3*inch))
@@ -133,7 +153,7 @@ def create_pdf_invoice(json_file_path, output_path):
             'Note',
             parent=styles['Normal'],
             fontSize=9,
-            textColor=colors.HexColor('#dc3545'),
+            textColor=RED,
             fontName='Helvetica-Oblique',
             alignment=TA_CENTER
         )
@@ -142,6 +162,7 @@ def create_pdf_invoice(json_file_path, output_path):
     
     # Build PDF
     doc.build(story)
+    Path(output_path).write_bytes(buffer.getvalue())
     print(f"✓ Created: {output_path}")
 
 def main():
@@ -158,7 +179,17 @@ def main():
     pdf_dir.mkdir(exist_ok=True)
     
     # Find all JSON files
-    json_files = sorted(sample_dir.glob("sample_invoice_*.json"))
+    with os.scandir(sample_dir) as entries:
+        json_files = sorted(
+            (
+                Path(entry.path)
+                for entry in entries
+                if entry.is_file()
+                and entry.name.startswith("sample_invoice_")
+                and entry.name.endswith(".json")
+            ),
+            key=lambda path: path.name,
+        )
     
     if not json_files:
         print("⚠️  No JSON invoice files found!")
@@ -1,13 +1,14 @@
 """Tests to achieve full coverage of app (excluding parser_service and erpnext_client)."""
-import copy
+import os
 import uuid
 import pytest
-from unittest.mock import patch, MagicMock
+from unittest.mock import patch, mock_open
 from fastapi import status
 from pathlib import Path
 
-from app.config import Config
-from app.models.invoice import InvoiceItem, ParsedInvoice, Invoice
+from app.config import Config, _load_dotenv, _normalize_erpnext_base_url
+from app.exceptions import ParsingError
+from app.models.invoice import InvoiceItem, ParsedInvoice
 from app.services.storage_service import StorageService
 from app.services.anomaly_service import AnomalyService
 from app.controllers.invoice_controller import InvoiceController
@@ -16,21 +17,34 @@ from app.services.parser_service import ParserService
 from datetime import datetime
 
 
+_NOW = datetime(2024, 1, 1, 10, 0, 0)
+
+
+class _FakePath:
+    """Stand-in for pathlib.Path where no file exists."""
+
+    def __init__(self, *args):
+        pass
+
+    def __truediv__(self, other):
+        return self
+
+    def exists(self):
+        return False
+
+
 # ----- Config -----
 class TestConfigCoverage:
     """Cover config.py branches."""
 
     def test_normalize_erpnext_base_url_empty(self):
-        from app.config import _normalize_erpnext_base_url
         assert _normalize_erpnext_base_url("") == ""
 
     def test_normalize_erpnext_base_url_exception(self):
-        from app.config import _normalize_erpnext_base_url
         result = _normalize_erpnext_base_url("http://valid.com/path")
         assert result == "http://valid.com"
 
     def test_normalize_erpnext_base_url_urlparse_raises(self):
-        from app.config import _normalize_erpnext_base_url
         with patch("app.config.urlparse", side_effect=ValueError("bad")):
             result = _normalize_erpnext_base_url("http://host/path")
             assert result == "http://host/path"
@@ -42,12 +56,9 @@ class TestConfigCoverage:
                     assert Config.validate_erpnext_config() is False
 
     def test_load_dotenv_file_not_exists(self):
-        from app.config import _load_dotenv
         _load_dotenv(Path("/nonexistent/path/.env"))  # no raise, early return
 
     def test_load_dotenv_sets_value_when_key_not_in_environ(self, tmp_path):
-        import os
-        from app.config import _load_dotenv
         env_file = tmp_path / ".env"
         env_file.write_text('COVERAGE_TEST_KEY=coverage_value\n')
         try:
@@ -82,166 +93,100 @@ class TestInvoiceModelCoverage:
 class TestStorageCoverage:
     """Cover storage_service branches."""
 
-    def test_storage_persist_false(self):
+    def test_storage_persist_false(self, empty_invoice):
         s = StorageService(persist=False)
         assert len(s._invoices) == 0
         # Call save to hit _save_to_file early return (line 49)
-        inv = Invoice(
-            id="x",
-            parsed_data=ParsedInvoice(
-                vendor_name="V",
-                invoice_number="N",
-                invoice_date=datetime.now(),
-                total_amount=100.0,
-                items=[],
-                currency="USD",
-            ),
-            uploaded_at=datetime.now(),
-        )
-        s.save(inv)
-        assert s._invoices["x"] == inv
+        s.save(empty_invoice)
+        assert s._invoices["x"] == empty_invoice
 
-    def test_storage_load_bad_json(self, tmp_path):
-        bad_file = tmp_path / "invoices.json"
-        bad_file.write_text("not valid json {")
-        with patch("app.services.storage_service._storage_path", return_value=bad_file):
+    def test_storage_load_bad_json(self):
+        with patch("app.services.storage_service._storage_path") as sp, \
+                patch("builtins.open", mock_open(read_data="not valid json {")):
+            sp.return_value.exists.return_value = True
             s = StorageService(persist=True)
             assert s._invoices == {}
 
-    def test_storage_save_to_file_exception(self):
+    def test_storage_save_to_file_exception(self, empty_invoice):
         s = StorageService(persist=True)
-        inv = Invoice(
-            id="x",
-            parsed_data=ParsedInvoice(
-                vendor_name="V",
-                invoice_number="N",
-                invoice_date=datetime.now(),
-                total_amount=100.0,
-                items=[],
-                currency="USD",
-            ),
-            uploaded_at=datetime.now(),
-        )
         with patch("builtins.open", side_effect=OSError("disk full")):
-            s.save(inv)  # exception swallowed in _save_to_file
-        assert s._invoices["x"] == inv
+            s.save(empty_invoice)  # exception swallowed in _save_to_file
+        assert s._invoices["x"] == empty_invoice
+
+    def test_storage_save_to_file_round_trip(self, empty_invoice, tmp_path):
+        path = tmp_path / "invoices.json"
+        with patch("app.services.storage_service._storage_path", return_value=path):
+            StorageService(persist=True).save(empty_invoice)
+            assert path.exists()
+            reloaded = StorageService(persist=True)  # _load reads the file written above
+        assert reloaded._invoices == {"x": empty_invoice}
 
 
 # ----- Anomaly service -----
 class TestAnomalyServiceCoverage:
     """Cover anomaly_service missing branches."""
 
-    def test_quantity_deviation_above_avg(self, client):
-        vendor = f"Vendor-Qty-{uuid.uuid4().hex[:8]}"
-        hist = {
-            "vendor_name": vendor,
-            "invoice_number": "H1",
-            "invoice_date": "2024-01-01T00:00:00",
-            "total_amount": 100.0,
-            "items": [{"name": "Item1", "quantity": 10.0, "unit_price": 10.0, "total_price": 100.0}],
-            "currency": "USD",
-        }
-        client.post("/api/invoices/create", json=hist)
-        new_inv = copy.deepcopy(hist)
-        new_inv["invoice_number"] = "N1"
-        new_inv["invoice_date"] = "2024-01-15T00:00:00"
-        new_inv["items"][0]["quantity"] = 30.0  # 3x average
-        new_inv["items"][0]["total_price"] = 300.0
-        new_inv["total_amount"] = 300.0
-        r = client.post("/api/invoices/create", json=new_inv)
-        aid = r.json()["id"]
-        resp = client.post(f"/api/invoices/{aid}/analyze")
-        assert resp.status_code == 200
-        data = resp.json()
-        assert any("quantity" in a.get("description", "").lower() or "Quantity" in a.get("description", "") for a in data.get("anomalies", []))
-
-    def test_amount_deviation(self, client):
-        vendor = f"Vendor-Amt-{uuid.uuid4().hex[:8]}"
+    @pytest.mark.parametrize("hist_item, new_item, new_total, check", [
+        pytest.param(
+            {"name": "Item1", "quantity": 10.0, "unit_price": 10.0, "total_price": 100.0},
+            {"quantity": 30.0, "total_price": 300.0},  # 3x average
+            300.0,
+            lambda data: any("quantity" in a.get("description", "").lower() for a in data.get("anomalies", [])),
+            id="quantity_above_avg",
+        ),
+        pytest.param(
+            {"name": "I", "quantity": 1.0, "unit_price": 100.0, "total_price": 100.0},
+            {"total_price": 500.0},
+            500.0,
+            lambda data: data["risk_score"] >= 0,
+            id="amount_deviation",
+        ),
+        # Covers elif item.quantity > max_quantity * 1.5 (lines 145-146)
+        pytest.param(
+            {"name": "I", "quantity": 10.0, "unit_price": 10.0, "total_price": 100.0},
+            {"quantity": 18.0, "total_price": 180.0},  # 1.8x max, not 2x avg (avg=10)
+            180.0,
+            lambda data: True,
+            id="quantity_above_max_only",
+        ),
+        # Covers direction 'below' in amount deviation (line 197)
+        pytest.param(
+            {"name": "I", "quantity": 1.0, "unit_price": 1000.0, "total_price": 1000.0},
+            {"total_price": 500.0},
+            500.0,  # 50% below average
+            lambda data: "below" in data.get("explanation", "").lower() or any(
+                "below" in a.get("description", "").lower() for a in data.get("anomalies", [])
+            ),
+            id="amount_below_average",
+        ),
+    ])
+    async def test_anomaly_variants(self, aclient, seed_invoice, hist_item, new_item, new_total, check):
         hist = {
-            "vendor_name": vendor,
+            "vendor_name": f"Vendor-{uuid.uuid4().hex[:8]}",
             "invoice_number": "H1",
             "invoice_date": "2024-01-01T00:00:00",
-            "total_amount": 100.0,
-            "items": [{"name": "I", "quantity": 1.0, "unit_price": 100.0, "total_price": 100.0}],
+            "total_amount": hist_item["total_price"],
+            "items": [hist_item],
             "currency": "USD",
         }
-        client.post("/api/invoices/create", json=hist)
-        new_inv = copy.deepcopy(hist)
-        new_inv["invoice_number"] = "N1"
-        new_inv["invoice_date"] = "2024-01-15T00:00:00"
-        new_inv["total_amount"] = 500.0
-        new_inv["items"][0]["total_price"] = 500.0
-        r = client.post("/api/invoices/create", json=new_inv)
-        aid = r.json()["id"]
-        resp = client.post(f"/api/invoices/{aid}/analyze")
-        assert resp.status_code == 200
-        data = resp.json()
-        assert data["risk_score"] >= 0
-
-    def test_quantity_deviation_above_max_only(self, client):
-        """Covers elif item.quantity > max_quantity * 1.5 (lines 145-146)."""
-        vendor = f"Vendor-Max-{uuid.uuid4().hex[:8]}"
-        hist = {
-            "vendor_name": vendor,
-            "invoice_number": "H1",
-            "invoice_date": "2024-01-01T00:00:00",
-            "total_amount": 100.0,
-            "items": [{"name": "I", "quantity": 10.0, "unit_price": 10.0, "total_price": 100.0}],
-            "currency": "USD",
+        seed_invoice(hist)
+        new_inv = {
+            **hist,
+            "invoice_number": "N1",
+            "invoice_date": "2024-01-15T00:00:00",
+            "total_amount": new_total,
+            "items": [{**hist_item, **new_item}],
         }
-        client.post("/api/invoices/create", json=hist)
-        new_inv = copy.deepcopy(hist)
-        new_inv["invoice_number"] = "N1"
-        new_inv["invoice_date"] = "2024-01-15T00:00:00"
-        new_inv["items"][0]["quantity"] = 18.0  # 1.8x max, not 2x avg (avg=10)
-        new_inv["items"][0]["total_price"] = 180.0
-        new_inv["total_amount"] = 180.0
-        r = client.post("/api/invoices/create", json=new_inv)
+        r = await aclient.post("/api/invoices/create", json=new_inv)
         aid = r.json()["id"]
-        resp = client.post(f"/api/invoices/{aid}/analyze")
+        resp = await aclient.post(f"/api/invoices/{aid}/analyze")
         assert resp.status_code == 200
+        assert check(resp.json())
 
-    def test_amount_deviation_below_average(self, client):
-        """Covers direction 'below' in amount deviation (line 197)."""
-        vendor = f"Vendor-Below-{uuid.uuid4().hex[:8]}"
-        hist = {
-            "vendor_name": vendor,
-            "invoice_number": "H1",
-            "invoice_date": "2024-01-01T00:00:00",
-            "total_amount": 1000.0,
-            "items": [{"name": "I", "quantity": 1.0, "unit_price": 1000.0, "total_price": 1000.0}],
-            "currency": "USD",
-        }
-        client.post("/api/invoices/create", json=hist)
-        new_inv = copy.deepcopy(hist)
-        new_inv["invoice_number"] = "N1"
-        new_inv["invoice_date"] = "2024-01-15T00:00:00"
-        new_inv["total_amount"] = 500.0  # 50% below average
-        new_inv["items"][0]["total_price"] = 500.0
-        r = client.post("/api/invoices/create", json=new_inv)
-        aid = r.json()["id"]
-        resp = client.post(f"/api/invoices/{aid}/analyze")
-        assert resp.status_code == 200
-        assert "below" in resp.json().get("explanation", "").lower() or any(
-            "below" in a.get("description", "").lower() for a in resp.json().get("anomalies", [])
-        )
-
-    def test_generate_explanation_risk_levels(self):
+    def test_generate_explanation_risk_levels(self, empty_invoice):
         storage = StorageService(persist=False)
         svc = AnomalyService(storage)
-        inv = Invoice(
-            id="i",
-            parsed_data=ParsedInvoice(
-                vendor_name="V",
-                invoice_number="N",
-                invoice_date=datetime.now(),
-                total_amount=100.0,
-                items=[],
-                currency="USD",
-            ),
-            uploaded_at=datetime.now(),
-        )
-        res = svc.analyze_invoice(inv)
+        res = svc.analyze_invoice(empty_invoice)
         assert res.risk_score == 10
         assert "historical" in res.explanation.lower()
 
@@ -251,12 +196,10 @@ class TestInvoiceControllerUploadCoverage:
     """Cover upload_and_parse_invoice (controller lines 30-37)."""
 
     def test_upload_invoice_success_mock_parser(self, client):
-        from app.models.invoice import ParsedInvoice, InvoiceItem
-        from datetime import datetime
         parsed = ParsedInvoice(
             vendor_name="Upload Vendor",
             invoice_number="UP-001",
-            invoice_date=datetime.now(),
+            invoice_date=_NOW,
             total_amount=200.0,
             items=[InvoiceItem(name="P", quantity=2.0, unit_price=100.0, total_price=200.0)],
             currency="USD",
@@ -274,24 +217,19 @@ class TestMainCoverage:
     """Cover main.py routes and handlers."""
 
     def test_root_fallback_when_no_static(self, client):
-        mock_path = MagicMock()
-        mock_path.return_value.exists.return_value = False
-        with patch("app.main.Path", mock_path):
+        with patch("app.main.Path", _FakePath):
             r = client.get("/")
             assert r.status_code == 200
             assert "Frontend not built" in r.text or "Invoice Parser" in r.text
 
     def test_serve_react_fallback(self, client):
-        mock_path = MagicMock()
-        mock_path.return_value.exists.return_value = False
-        with patch("app.main.Path", mock_path):
+        with patch("app.main.Path", _FakePath):
             r = client.get("/invoices")
             assert r.status_code == 200
             assert "Frontend not built" in r.text or "Run" in r.text
 
     def test_parsing_error_handler(self, client):
         with patch("app.views.invoice_views.invoice_controller.parser") as m:
-            from app.exceptions import ParsingError
             m.parse_invoice.side_effect = ParsingError("Parse failed")
             r = client.post("/api/invoices/upload", files={"file": ("x.pdf", b"x", "application/pdf")})
         assert r.status_code == status.HTTP_400_BAD_REQUEST
@@ -312,10 +250,9 @@ class TestMainCoverage:
             })
         assert r.status_code == status.HTTP_500_INTERNAL_SERVER_ERROR
 
-    def test_middleware_submit_404(self, client):
+    def test_middleware_submit_404(self, client, erpnext_configured):
         """Covers middleware branch when 404 on submit-to-erpnext (main 31, 34)."""
-        with patch("app.config.Config.validate_erpnext_config", return_value=True):
-            r = client.post("/api/invoices/nonexistent-id/submit-to-erpnext")
+        r = client.post("/api/invoices/nonexistent-id/submit-to-erpnext")
         assert r.status_code == status.HTTP_404_NOT_FOUND
 
 
@@ -323,37 +260,29 @@ class TestMainCoverage:
 class TestInvoiceViewsCoverage:
     """Cover submit-to-erpnext and delete exception path."""
 
-    def test_submit_already_submitted(self, client, mock_invoice_data):
+    @patch("app.services.erpnext_client.ERPNextClient")
+    def test_submit_already_submitted(self, E, client, mock_invoice_data, erpnext_configured):
+        E.return_value.create_purchase_invoice.return_value = {"data": {"name": "PINV-001"}}
         r = client.post("/api/invoices/create", json=mock_invoice_data)
         aid = r.json()["id"]
-        with patch("app.config.Config.validate_erpnext_config", return_value=True):
-            with patch("app.services.erpnext_client.ERPNextClient") as E:
-                E.return_value.create_purchase_invoice.return_value = {"data": {"name": "PINV-001"}}
-                client.post(f"/api/invoices/{aid}/submit-to-erpnext")
-                r2 = client.post(f"/api/invoices/{aid}/submit-to-erpnext")
+        client.post(f"/api/invoices/{aid}/submit-to-erpnext")
+        r2 = client.post(f"/api/invoices/{aid}/submit-to-erpnext")
         assert r2.status_code == status.HTTP_400_BAD_REQUEST
         assert "already been submitted" in r2.json()["detail"]
 
-    def test_submit_erpnext_not_configured(self, client, mock_invoice_data):
+    def test_submit_erpnext_not_configured(self, client, mock_invoice_data, erpnext_unconfigured):
         r = client.post("/api/invoices/create", json=mock_invoice_data)
         aid = r.json()["id"]
-        with patch("app.config.Config.validate_erpnext_config", return_value=False):
-            r2 = client.post(f"/api/invoices/{aid}/submit-to-erpnext")
+        r2 = client.post(f"/api/invoices/{aid}/submit-to-erpnext")
         assert r2.status_code == status.HTTP_400_BAD_REQUEST
         assert "not configured" in r2.json()["detail"].lower()
 
-    def test_submit_success_mocked(self, client, mock_invoice_data):
+    @patch("app.services.erpnext_client.ERPNextClient")
+    def test_submit_success_mocked(self, E, client, mock_invoice_data, erpnext_configured):
+        E.return_value.create_purchase_invoice.return_value = {"data": {"name": "PINV-001"}}
         r = client.post("/api/invoices/create", json=mock_invoice_data)
         aid = r.json()["id"]
-        with patch("app.config.Config.validate_erpnext_config", return_value=True):
-            with patch("app.config.Config.ERPNEXT_BASE_URL", "http://test"):
-                with patch("app.config.Config.ERPNEXT_API_KEY", "k"):
-                    with patch("app.config.Config.ERPNEXT_API_SECRET", "s"):
-                        with patch("app.services.erpnext_client.ERPNextClient") as E:
-                            inst = MagicMock()
-                            inst.create_purchase_invoice.return_value = {"data": {"name": "PINV-001"}}
-                            E.return_value = inst
-                            r2 = client.post(f"/api/invoices/{aid}/submit-to-erpnext")
+        r2 = client.post(f"/api/invoices/{aid}/submit-to-erpnext")
         assert r2.status_code == 200
         assert r2.json().get("submitted_to_erpnext") is True
 
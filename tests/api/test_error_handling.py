@@ -1,5 +1,4 @@
 """Tests for error handling in API."""
-import pytest
 from fastapi import status
 from app.exceptions import InvoiceNotFoundError, ParsingError, InvalidInvoiceFormatError
 
@@ -1,13 +1,16 @@
 """API tests for invoice endpoints."""
-import copy
 import uuid
-import pytest
 from fastapi import status
-from unittest.mock import Mock, patch, MagicMock
+from unittest.mock import patch
 from app.models.invoice import Invoice, ParsedInvoice, InvoiceItem
 from datetime import datetime
 
 
+def _clone_invoice(inv):
+    """Copy an invoice payload, including its items, without copy.deepcopy."""
+    return {**inv, "items": [dict(item) for item in inv["items"]]}
+
+
 class TestInvoiceUpload:
     """Tests for invoice upload endpoint."""
     
@@ -70,15 +73,11 @@ class TestInvoiceRetrieval:
         
         assert response.status_code == status.HTTP_404_NOT_FOUND
     
-    def test_list_invoices(self, client, mock_invoice_data):
+    def test_list_invoices(self, client, frozen_invoice_data, seed_invoice):
         """Test listing all invoices."""
         # Create multiple invoices
-        client.post("/api/invoices/create", json=mock_invoice_data)
-        
-        # Modify for second invoice
-        second_invoice = mock_invoice_data.copy()
-        second_invoice["invoice_number"] = "INV-002"
-        client.post("/api/invoices/create", json=second_invoice)
+        for number in ("INV-001", "INV-002"):
+            seed_invoice({**frozen_invoice_data, "invoice_number": number})
         
         # List all invoices
         response = client.get("/api/invoices")
@@ -129,8 +128,8 @@ class TestAnomalyAnalysis:
         }
         client.post("/api/invoices/create", json=historical_invoice)
         
-        # Create new invoice with price increase (deep copy so we don't mutate historical)
-        new_invoice = copy.deepcopy(historical_invoice)
+        # Create new invoice with price increase (clone so we don't mutate historical)
+        new_invoice = _clone_invoice(historical_invoice)
         new_invoice["invoice_number"] = "INV-NEW-001"
         new_invoice["invoice_date"] = "2024-01-15T10:00:00"
         new_invoice["items"][0]["unit_price"] = 75.0  # 50% increase
@@ -170,8 +169,8 @@ class TestAnomalyAnalysis:
         }
         client.post("/api/invoices/create", json=historical_invoice)
         
-        # Create new invoice with new item (deep copy so we don't mutate historical)
-        new_invoice = copy.deepcopy(historical_invoice)
+        # Create new invoice with new item (clone so we don't mutate historical)
+        new_invoice = _clone_invoice(historical_invoice)
         new_invoice["invoice_number"] = "INV-NEW-001"
         new_invoice["invoice_date"] = "2024-01-15T10:00:00"
         new_invoice["items"].append({
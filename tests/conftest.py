@@ -1,20 +1,88 @@
 """Pytest configuration and fixtures."""
+from datetime import datetime
+from types import MappingProxyType
+
+import httpx
 import pytest
 from fastapi.testclient import TestClient
 from app.main import app
+from app.config import Config
 from app.services.storage_service import StorageService
 from app.services.parser_service import ParserService
 from app.services.anomaly_service import AnomalyService
 from app.controllers.invoice_controller import InvoiceController
 from app.controllers.anomaly_controller import AnomalyController
+from app.views.invoice_views import invoice_controller
+from app.models.invoice import Invoice, ParsedInvoice
 
 
-@pytest.fixture
+_NOW = datetime(2024, 1, 1, 10, 0, 0)
+
+
+@pytest.fixture(scope="session")
 def client():
-    """Create a test client."""
+    """Create a test client shared by the whole test session."""
     return TestClient(app)
 
 
+@pytest.fixture
+async def aclient():
+    """Create an async client that calls the app in-process."""
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as c:
+        yield c
+
+
+@pytest.fixture(autouse=True)
+def _reset_storage(monkeypatch):
+    """Clear the app's in-memory invoices before and after each test.
+
+    Persistence is switched off first, so the cleared store never overwrites data/invoices.json.
+    """
+    monkeypatch.setattr(invoice_controller.storage, "_persist", False)
+    invoice_controller.storage._invoices.clear()
+    yield
+    invoice_controller.storage._invoices.clear()
+
+
+@pytest.fixture
+def seed_invoice():
+    """Store an invoice in the app directly, bypassing the HTTP layer."""
+    return invoice_controller.create_invoice_from_data
+
+
+@pytest.fixture
+def erpnext_configured(monkeypatch):
+    """Make the app see a valid ERPNext configuration."""
+    monkeypatch.setattr(Config, "ERPNEXT_BASE_URL", "http://test")
+    monkeypatch.setattr(Config, "ERPNEXT_API_KEY", "k")
+    monkeypatch.setattr(Config, "ERPNEXT_API_SECRET", "s")
+    monkeypatch.setattr(Config, "validate_erpnext_config", staticmethod(lambda: True))
+
+
+@pytest.fixture
+def erpnext_unconfigured(monkeypatch):
+    """Make the app see a missing ERPNext configuration."""
+    monkeypatch.setattr(Config, "validate_erpnext_config", staticmethod(lambda: False))
+
+
+@pytest.fixture(scope="session")
+def empty_invoice():
+    """An invoice with no items, shared across tests; must not be modified."""
+    return Invoice(
+        id="x",
+        parsed_data=ParsedInvoice(
+            vendor_name="V",
+            invoice_number="N",
+            invoice_date=_NOW,
+            total_amount=100.0,
+            items=[],
+            currency="USD",
+        ),
+        uploaded_at=_NOW,
+    )
+
+
 @pytest.fixture
 def storage_service():
     """Create a fresh storage service for each test."""
@@ -27,27 +95,40 @@ def parser_service():
     return ParserService()
 
 
+# Read-only all the way down (mapping proxies, tuple of items); mock_invoice_data hands out mutable copies
+_MOCK_INVOICE = MappingProxyType({
+    "vendor_name": "Test Vendor",
+    "invoice_number": "INV-001",
+    "invoice_date": "2024-01-15T10:00:00",
+    "total_amount": 1000.0,
+    "items": (
+        MappingProxyType({
+            "name": "Product A",
+            "quantity": 10.0,
+            "unit_price": 50.0,
+            "total_price": 500.0
+        }),
+        MappingProxyType({
+            "name": "Product B",
+            "quantity": 5.0,
+            "unit_price": 100.0,
+            "total_price": 500.0
+        }),
+    ),
+    "currency": "USD"
+})
+
+
 @pytest.fixture
 def mock_invoice_data():
-    """Sample invoice data for testing."""
-    return {
-        "vendor_name": "Test Vendor",
-        "invoice_number": "INV-001",
-        "invoice_date": "2024-01-15T10:00:00",
-        "total_amount": 1000.0,
-        "items": [
-            {
-                "name": "Product A",
-                "quantity": 10.0,
-                "unit_price": 50.0,
-                "total_price": 500.0
-            },
-            {
-                "name": "Product B",
-                "quantity": 5.0,
-                "unit_price": 100.0,
-                "total_price": 500.0
-            }
-        ],
-        "currency": "USD"
-    }
+    """Sample invoice data for testing (a fresh copy tests may modify)."""
+    return {**_MOCK_INVOICE, "items": [dict(item) for item in _MOCK_INVOICE["items"]]}
+
+
+@pytest.fixture(scope="session")
+def frozen_invoice_data():
+    """Sample invoice data shared across tests, as a read-only mapping (items included).
+
+    It is not JSON-serialisable as is; use mock_invoice_data for request bodies.
+    """
+    return _MOCK_INVOICE
@@ -6,50 +6,141 @@ These tests require:
 - ERPNext API credentials configured (ERPNEXT_API_KEY, ERPNEXT_API_SECRET)
 
 Run with: python -m unittest tests.integration.test_invoice_integration -v
+Or in parallel: pytest tests/integration/ -n auto --dist=loadscope
 """
+import io
 import os
 import unittest
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 import requests
 from pathlib import Path
+from types import MappingProxyType
+from urllib.parse import urlsplit, urlunsplit
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 
-# Base URLs - can be overridden with environment variables
-BACKEND_URL = os.getenv("BACKEND_URL", "http://localhost:8000").rstrip("/")
-ERPNEXT_BASE_URL = os.getenv("ERPNEXT_BASE_URL", "http://localhost:8080").rstrip("/")
+def _pin_localhost(url):
+    """Swap a localhost host for 127.0.0.1, so requests skip the resolver on every call."""
+    parts = urlsplit(url)
+    if parts.hostname != "localhost":
+        return url
+    userinfo, at, hostport = parts.netloc.rpartition("@")
+    return urlunsplit(parts._replace(netloc=f"{userinfo}{at}127.0.0.1{hostport[len('localhost'):]}"))
 
 
-def _check_backend_available():
-    """Check if backend is running."""
-    try:
-        response = requests.get(f"{BACKEND_URL}/health", timeout=5)
-        return response.status_code == 200
-    except Exception:
-        return False
-
+# Base URLs - can be overridden with environment variables
+BACKEND_URL = _pin_localhost(os.getenv("BACKEND_URL", "http://localhost:8000").rstrip("/"))
+ERPNEXT_BASE_URL = os.getenv("ERPNEXT_BASE_URL", "http://localhost:8080").rstrip("/")
 
-def _check_erpnext_available():
-    """Check if ERPNext is accessible."""
+INVOICES_URL = f"{BACKEND_URL}/api/invoices"
+UPLOAD_URL = f"{INVOICES_URL}/upload"
+CREATE_URL = f"{INVOICES_URL}/create"
+
+# Invoice payloads for the JSON /create endpoint (read-only); tests add a unique invoice_number
+INVOICE_DATE = "2024-01-15T10:00:00"
+MULTI_ITEM_INVOICE = MappingProxyType({
+    "vendor_name": "Integration Test Vendor",
+    "invoice_date": INVOICE_DATE,
+    "total_amount": 1500.0,
+    "items": (
+        {"name": "Widget A", "quantity": 10.0, "unit_price": 50.0, "total_price": 500.0},
+        {"name": "Widget B", "quantity": 5.0, "unit_price": 200.0, "total_price": 1000.0},
+    ),
+    "currency": "USD",
+})
+SINGLE_ITEM_INVOICE = MappingProxyType({
+    "vendor_name": "ERPNext Test Vendor",
+    "invoice_date": INVOICE_DATE,
+    "total_amount": 2000.0,
+    "items": (
+        {"name": "Test Product", "quantity": 1.0, "unit_price": 2000.0, "total_price": 2000.0},
+    ),
+    "currency": "USD",
+})
+
+# Default timeout for calls that don't pass one; slow calls (upload, submit) set their own
+DEFAULT_TIMEOUT = 10
+
+# pytest-xdist worker id, so parallel workers never create clashing invoice numbers
+WORKER = os.getenv("PYTEST_XDIST_WORKER", "gw0")
+
+
+def _invoice_number(prefix):
+    """Unique invoice number for this run and worker."""
+    return f"{prefix}-{WORKER}-{uuid.uuid4().hex[:6]}"
+
+
+class _TimeoutHTTPAdapter(HTTPAdapter):
+    """HTTPAdapter that applies DEFAULT_TIMEOUT when a request has none."""
+
+    def send(self, request, **kwargs):
+        if kwargs.get("timeout") is None:
+            kwargs["timeout"] = DEFAULT_TIMEOUT
+        return super().send(request, **kwargs)
+
+
+@lru_cache(maxsize=1)
+def _session():
+    """Shared HTTP session for the whole module (keeps connections alive between tests)."""
+    session = requests.Session()
+    adapter = _TimeoutHTTPAdapter(pool_connections=16, pool_maxsize=32, max_retries=Retry(total=2, backoff_factor=0.1))
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+def tearDownModule():
+    _session().close()
+
+
+@lru_cache(maxsize=None)
+def _is_available(url):
+    """Return True if url answers with 200 (probed once per run per URL)."""
     try:
-        response = requests.get(f"{ERPNEXT_BASE_URL}/api/method/ping", timeout=5)
+        response = _session().get(url, timeout=5)
         return response.status_code == 200
     except Exception:
         return False
 
 
+@lru_cache(maxsize=1)
 def _get_sample_pdf_path():
     """Return path to sample PDF or None if not found."""
     pdf_path = Path(__file__).resolve().parent.parent.parent / "sample_invoices" / "pdf" / "sample_invoice_1.pdf"
     return str(pdf_path) if pdf_path.exists() else None
 
 
+@lru_cache(maxsize=1)
+def _sample_pdf_bytes():
+    """Contents of the sample PDF, read from disk once per run."""
+    return Path(_get_sample_pdf_path()).read_bytes()
+
+
+@lru_cache(maxsize=1)
+def _upload_sample_pdf():
+    """Upload the sample PDF once per run and return the response."""
+    files = {"file": ("invoice.pdf", io.BytesIO(_sample_pdf_bytes()), "application/pdf")}
+    return _session().post(UPLOAD_URL, files=files, timeout=30)
+
+
 class IntegrationTestCase(unittest.TestCase):
     """Base for integration tests. Skips if backend is not available."""
 
     @classmethod
     def setUpClass(cls):
-        if not _check_backend_available():
+        cls.session = _session()
+        if not _is_available(f"{BACKEND_URL}/health"):
             raise unittest.SkipTest(f"Backend not available at {BACKEND_URL}. Start backend with: python run.py")
 
+    def _uploaded_sample(self):
+        """Response of the shared sample PDF upload (skips if the PDF is missing)."""
+        if not _get_sample_pdf_path():
+            self.skipTest("Sample PDF not found: sample_invoices/pdf/sample_invoice_1.pdf")
+        return _upload_sample_pdf()
+
 
 class IntegrationTestCaseWithERPNext(IntegrationTestCase):
     """Base for integration tests that need ERPNext. Skips if backend or ERPNext is not available."""
@@ -57,7 +148,7 @@ class IntegrationTestCaseWithERPNext(IntegrationTestCase):
     @classmethod
     def setUpClass(cls):
         super().setUpClass()
-        if not _check_erpnext_available():
+        if not _is_available(f"{ERPNEXT_BASE_URL}/api/method/ping"):
             raise unittest.SkipTest(
                 f"ERPNext not available at {ERPNEXT_BASE_URL}. Start ERPNext or set ERPNEXT_BASE_URL env var."
             )
@@ -66,18 +157,9 @@ class IntegrationTestCaseWithERPNext(IntegrationTestCase):
 class TestInvoiceUploadIntegration(IntegrationTestCase):
     """Integration tests for invoice upload with real backend."""
 
-    def _sample_pdf_path(self):
-        path = _get_sample_pdf_path()
-        if not path:
-            self.skipTest("Sample PDF not found: sample_invoices/pdf/sample_invoice_1.pdf")
-        return path
-
     def test_upload_invoice_file(self):
         """Test uploading a real PDF invoice file."""
-        sample_pdf_path = self._sample_pdf_path()
-        with open(sample_pdf_path, "rb") as f:
-            files = {"file": ("invoice.pdf", f, "application/pdf")}
-            response = requests.post(f"{BACKEND_URL}/api/invoices/upload", files=files, timeout=30)
+        response = self._uploaded_sample()
 
         self.assertEqual(response.status_code, 201, f"Expected 201, got {response.status_code}: {response.text}")
         data = response.json()
@@ -88,42 +170,29 @@ class TestInvoiceUploadIntegration(IntegrationTestCase):
 
     def test_create_invoice_via_json(self):
         """Test creating an invoice via JSON API."""
-        invoice_data = {
-            "vendor_name": "Integration Test Vendor",
-            "invoice_number": "INT-TEST-001",
-            "invoice_date": "2024-01-15T10:00:00",
-            "total_amount": 1500.0,
-            "items": [
-                {"name": "Widget A", "quantity": 10.0, "unit_price": 50.0, "total_price": 500.0},
-                {"name": "Widget B", "quantity": 5.0, "unit_price": 200.0, "total_price": 1000.0},
-            ],
-            "currency": "USD",
-        }
-
-        response = requests.post(
-            f"{BACKEND_URL}/api/invoices/create",
+        invoice_number = _invoice_number("INT-TEST")
+        invoice_data = {**MULTI_ITEM_INVOICE, "invoice_number": invoice_number}
+
+        response = self.session.post(
+            CREATE_URL,
             json=invoice_data,
-            timeout=10,
         )
 
         self.assertEqual(response.status_code, 201)
         data = response.json()
-        self.assertEqual(data["parsed_data"]["vendor_name"], "Integration Test Vendor")
-        self.assertEqual(data["parsed_data"]["invoice_number"], "INT-TEST-001")
+        self.assertEqual(data["parsed_data"]["vendor_name"], MULTI_ITEM_INVOICE["vendor_name"])
+        self.assertEqual(data["parsed_data"]["invoice_number"], invoice_number)
         self.assertEqual(len(data["parsed_data"]["items"]), 2)
         self.assertIn("risk_score", data)
 
     def test_get_invoice_after_upload(self):
         """Test retrieving an invoice after upload."""
-        sample_pdf_path = self._sample_pdf_path()
-        with open(sample_pdf_path, "rb") as f:
-            files = {"file": ("invoice.pdf", f, "application/pdf")}
-            upload_response = requests.post(f"{BACKEND_URL}/api/invoices/upload", files=files, timeout=30)
+        upload_response = self._uploaded_sample()
 
         self.assertEqual(upload_response.status_code, 201)
         invoice_id = upload_response.json()["id"]
 
-        get_response = requests.get(f"{BACKEND_URL}/api/invoices/{invoice_id}", timeout=10)
+        get_response = self.session.get(f"{INVOICES_URL}/{invoice_id}")
         self.assertEqual(get_response.status_code, 200)
         data = get_response.json()
         self.assertEqual(data["id"], invoice_id)
@@ -132,7 +201,7 @@ class TestInvoiceUploadIntegration(IntegrationTestCase):
 
     def test_list_invoices(self):
         """Test listing all invoices."""
-        response = requests.get(f"{BACKEND_URL}/api/invoices", timeout=10)
+        response = self.session.get(INVOICES_URL)
         self.assertEqual(response.status_code, 200)
         invoices = response.json()
         self.assertIsInstance(invoices, list)
@@ -141,32 +210,35 @@ class TestInvoiceUploadIntegration(IntegrationTestCase):
 class TestERPNextIntegration(IntegrationTestCaseWithERPNext):
     """Integration tests for ERPNext submission."""
 
+    _submitted = None
+
+    def _submitted_invoice(self):
+        """Create one invoice and submit it to ERPNext; shared by the tests in this class.
+
+        Returns (invoice_id, submit_response).
+        """
+        cls = type(self)
+        if cls._submitted is None:
+            invoice_data = {**SINGLE_ITEM_INVOICE, "invoice_number": _invoice_number("ERP-TEST")}
+
+            create_response = self.session.post(
+                CREATE_URL,
+                json=invoice_data,
+            )
+            self.assertEqual(create_response.status_code, 201)
+            invoice_id = create_response.json()["id"]
+
+            submit_response = self.session.post(
+                f"{INVOICES_URL}/{invoice_id}/submit-to-erpnext",
+                json={},
+                timeout=30,
+            )
+            cls._submitted = (invoice_id, submit_response)
+        return cls._submitted
+
     def test_submit_invoice_to_erpnext(self):
         """Test submitting an invoice to ERPNext."""
-        invoice_data = {
-            "vendor_name": "ERPNext Test Vendor",
-            "invoice_number": "ERP-TEST-001",
-            "invoice_date": "2024-01-15T10:00:00",
-            "total_amount": 2000.0,
-            "items": [
-                {"name": "Test Product", "quantity": 1.0, "unit_price": 2000.0, "total_price": 2000.0}
-            ],
-            "currency": "USD",
-        }
-
-        create_response = requests.post(
-            f"{BACKEND_URL}/api/invoices/create",
-            json=invoice_data,
-            timeout=10,
-        )
-        self.assertEqual(create_response.status_code, 201)
-        invoice_id = create_response.json()["id"]
-
-        submit_response = requests.post(
-            f"{BACKEND_URL}/api/invoices/{invoice_id}/submit-to-erpnext",
-            json={},
-            timeout=30,
-        )
+        _, submit_response = self._submitted_invoice()
         self.assertEqual(
             submit_response.status_code, 200,
             f"Expected 200, got {submit_response.status_code}: {submit_response.text}"
@@ -178,34 +250,11 @@ class TestERPNextIntegration(IntegrationTestCaseWithERPNext):
 
     def test_submit_already_submitted_invoice(self):
         """Test submitting an invoice that's already been submitted."""
-        invoice_data = {
-            "vendor_name": "ERPNext Test Vendor Duplicate",
-            "invoice_number": "ERP-TEST-DUP-001",
-            "invoice_date": "2024-01-15T10:00:00",
-            "total_amount": 2000.0,
-            "items": [
-                {"name": "Test Product", "quantity": 1.0, "unit_price": 2000.0, "total_price": 2000.0}
-            ],
-            "currency": "USD",
-        }
-
-        create_response = requests.post(
-            f"{BACKEND_URL}/api/invoices/create",
-            json=invoice_data,
-            timeout=10,
-        )
-        self.assertEqual(create_response.status_code, 201)
-        invoice_id = create_response.json()["id"]
-
-        first_submit = requests.post(
-            f"{BACKEND_URL}/api/invoices/{invoice_id}/submit-to-erpnext",
-            json={},
-            timeout=30,
-        )
+        invoice_id, first_submit = self._submitted_invoice()
         self.assertEqual(first_submit.status_code, 200)
 
-        submit_response = requests.post(
-            f"{BACKEND_URL}/api/invoices/{invoice_id}/submit-to-erpnext",
+        submit_response = self.session.post(
+            f"{INVOICES_URL}/{invoice_id}/submit-to-erpnext",
             json={},
             timeout=30,
         )
@@ -217,31 +266,16 @@ class TestERPNextIntegration(IntegrationTestCaseWithERPNext):
 class TestFullWorkflowIntegration(IntegrationTestCaseWithERPNext):
     """End-to-end integration tests for complete workflows."""
 
-    def _sample_pdf_path(self):
-        path = _get_sample_pdf_path()
-        if not path:
-            self.skipTest("Sample PDF not found: sample_invoices/pdf/sample_invoice_1.pdf")
-        return path
-
     def test_full_invoice_lifecycle(self):
-        """Test complete workflow: upload -> parse -> view -> submit to ERPNext."""
-        sample_pdf_path = self._sample_pdf_path()
-
-        with open(sample_pdf_path, "rb") as f:
-            files = {"file": ("invoice.pdf", f, "application/pdf")}
-            upload_response = requests.post(f"{BACKEND_URL}/api/invoices/upload", files=files, timeout=30)
+        """Test complete workflow: upload -> parse -> submit to ERPNext -> view."""
+        upload_response = self._uploaded_sample()
 
         self.assertEqual(upload_response.status_code, 201)
         invoice_id = upload_response.json()["id"]
         self.assertIn("risk_score", upload_response.json())
 
-        get_response = requests.get(f"{BACKEND_URL}/api/invoices/{invoice_id}", timeout=10)
-        self.assertEqual(get_response.status_code, 200)
-        invoice_data = get_response.json()
-        self.assertEqual(invoice_data["id"], invoice_id)
-
-        submit_response = requests.post(
-            f"{BACKEND_URL}/api/invoices/{invoice_id}/submit-to-erpnext",
+        submit_response = self.session.post(
+            f"{INVOICES_URL}/{invoice_id}/submit-to-erpnext",
             json={},
             timeout=30,
         )
@@ -250,12 +284,19 @@ class TestFullWorkflowIntegration(IntegrationTestCaseWithERPNext):
         self.assertTrue(submit_data["submitted_to_erpnext"])
         self.assertIn("erpnext_invoice_name", submit_data)
 
-        final_get = requests.get(f"{BACKEND_URL}/api/invoices/{invoice_id}", timeout=10)
+        # Final GETs are independent of each other, so issue them concurrently
+        urls = [f"{INVOICES_URL}/{invoice_id}", INVOICES_URL]
+        with ThreadPoolExecutor(max_workers=len(urls)) as executor:
+            final_get, list_response = executor.map(self.session.get, urls)
+
         self.assertEqual(final_get.status_code, 200)
         final_data = final_get.json()
         self.assertTrue(final_data["submitted_to_erpnext"])
         self.assertEqual(final_data["erpnext_invoice_name"], submit_data["erpnext_invoice_name"])
 
+        self.assertEqual(list_response.status_code, 200)
+        self.assertIn(invoice_id, [inv["id"] for inv in list_response.json()])
+
 
 if __name__ == "__main__":
     unittest.main()
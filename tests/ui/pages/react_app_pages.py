@@ -1,111 +1,164 @@
 """Page objects for the React Invoice Parser UI (Upload, List, Detail)."""
+import base64
 import re
-from playwright.sync_api import Page, expect
+from functools import lru_cache
+from pathlib import Path
+from typing import TYPE_CHECKING
 
+# expect comes from the base module, which tolerates a missing Playwright install
+# (tests then skip in setUp instead of failing at import)
+from tests.ui.unittest_playwright import expect
 
-class ReactUploadPage:
-    """Upload page - React InvoiceUpload component."""
+if TYPE_CHECKING:
+    from playwright.sync_api import Page
 
-    def __init__(self, page: Page, base_url: str = "http://localhost:8000"):
-        self.page = page
-        self.base_url = base_url.rstrip("/")
+# Submit button label; matched loosely so the leading emoji doesn't matter
+_SUBMIT_TO_ERPNEXT_RE = re.compile(r"Submit to ERPNext")
 
-    def navigate(self):
-        self.page.goto(f"{self.base_url}/", wait_until="load")
-        expect(self.page.locator(".invoice-upload")).to_be_visible(timeout=15000)
 
-    @property
-    def upload_zone(self):
-        return self.page.locator(".upload-zone")
+# For each key -> CSS selector: match count, plus visibility and text of the first match.
+# "Visible" follows Playwright's rule: a non-empty bounding box and not visibility:hidden.
+_SNAPSHOT_STATE_JS = """(selectors) => {
+const isVisible = (el) => {
+    const rect = el.getBoundingClientRect();
+    return rect.width > 0 && rect.height > 0 && getComputedStyle(el).visibility !== 'hidden';
+};
+return Object.fromEntries(Object.entries(selectors).map(([key, selector]) => {
+    const matches = document.querySelectorAll(selector);
+    const first = matches[0];
+    return [key, {
+        count: matches.length,
+        visible: !!first && isVisible(first),
+        text: first ? first.textContent : '',
+    }];
+}));
+}"""
 
-    @property
-    def file_input(self):
-        return self.page.locator("#file-input")
 
-    @property
-    def choose_file_label(self):
-        return self.page.get_by_text("Choose File", exact=True)
+def _snapshot_state(page: "Page", selectors: dict) -> dict:
+    """Evaluate _SNAPSHOT_STATE_JS for selectors in a single page.evaluate call."""
+    return page.evaluate(_SNAPSHOT_STATE_JS, selectors)
+
+
+@lru_cache(maxsize=32)
+def _read_file_b64(file_path: str) -> str:
+    """File contents as base64 text, read from disk once per path."""
+    return base64.b64encode(Path(file_path).read_bytes()).decode("ascii")
+
+
+class ReactUploadPage:
+    """Upload page - React InvoiceUpload component."""
+
+    # CSS selectors read by snapshot_state (same elements as the result locators below)
+    STATE_SELECTORS = {
+        "risk_score": ".risk-score",
+        "vendor_name": ".detail-item .detail-value",
+        "explanation": ".analysis-results .explanation-box p",
+    }
+
+    def __init__(self, page: "Page", base_url: str = "http://localhost:8000"):
+        self.page = page
+        self.base_url = base_url.rstrip("/")
+        # Locators are lazy, so they can be built once here and reused by every call
+        # Scoped to the component: the topbar also renders an "Upload Invoice" h1 on this route
+        self.heading = page.locator(".invoice-upload").get_by_role("heading", level=1, name="Upload Invoice")
+        self.upload_zone = page.locator(".upload-zone")
+        self.file_input = page.locator("#file-input")
+        self.choose_file_label = page.get_by_text("Choose File", exact=True)
+        self.result_card = page.locator(".analysis-results .result-card")
+        self.risk_badge = page.locator(".risk-badge")
+        self.risk_score_text = page.locator(".risk-score")
+        # Explanation on upload results (scoped for fixture with multiple .explanation-box)
+        self.explanation_box = page.locator(".analysis-results .explanation-box p")
+        self.vendor_name = page.locator(".detail-item .detail-value").first
+        self.view_details_button = page.get_by_role("button", name="View Details")
+        self.upload_another_button = page.get_by_role("button", name="Upload Another")
+        # Upload-area error only (scoped for fixture with multiple .error-message)
+        self.error_message = page.locator(".invoice-upload .error-message")
+        self.anomalies_list = page.locator(".anomaly-item")
+
+    def navigate(self, wait_until: str = "domcontentloaded"):
+        self.page.goto(f"{self.base_url}/", wait_until=wait_until)
+        expect(self.heading).to_be_visible(timeout=15000)
 
     def upload_file(self, file_path: str):
         self.file_input.set_input_files(file_path)
 
     def set_file_via_drop(self, file_path: str):
-        with open(file_path, "rb") as f:
-            data = f.read()
         self.page.evaluate(
             """([content, name]) => {
+                const bin = atob(content);
+                const bytes = new Uint8Array(bin.length);
+                for (let i = 0; i < bin.length; i++) bytes[i] = bin.charCodeAt(i);
                 const dt = new DataTransfer();
-                const file = new File([new Uint8Array(content)], name, { type: 'application/pdf' });
+                const file = new File([bytes], name, { type: 'application/pdf' });
                 dt.items.add(file);
                 const zone = document.querySelector('.upload-zone');
                 zone.dispatchEvent(new DragEvent('drop', { dataTransfer: dt, bubbles: true }));
             }""",
-            [list(data), file_path.replace("\\", "/").split("/")[-1]],
+            [_read_file_b64(file_path), file_path.replace("\\", "/").split("/")[-1]],
         )
 
     def wait_for_results(self, timeout: int = 15000):
-        self.page.locator(".analysis-results .result-card").wait_for(state="visible", timeout=timeout)
+        self.result_card.wait_for(state="visible", timeout=timeout)
 
     def wait_for_error(self, timeout: int = 10000):
         """Upload-area error only (scoped to avoid multiple matches in fixture)."""
-        self.page.locator(".invoice-upload .error-message").wait_for(state="visible", timeout=timeout)
+        self.error_message.wait_for(state="visible", timeout=timeout)
 
-    @property
-    def result_card(self):
-        return self.page.locator(".analysis-results .result-card")
-
-    @property
-    def risk_badge(self):
-        return self.page.locator(".risk-badge")
-
-    @property
-    def risk_score_text(self):
-        return self.page.locator(".risk-score")
-
-    @property
-    def explanation_box(self):
-        """Explanation on upload results (scoped for fixture with multiple .explanation-box)."""
-        return self.page.locator(".analysis-results .explanation-box p")
-
-    @property
-    def vendor_name(self):
-        return self.page.locator(".detail-item .detail-value").first
-
-    @property
-    def view_details_button(self):
-        return self.page.get_by_role("button", name="View Details")
-
-    @property
-    def upload_another_button(self):
-        return self.page.get_by_role("button", name="Upload Another")
-
-    @property
-    def error_message(self):
-        """Upload-area error only (scoped for fixture with multiple .error-message)."""
-        return self.page.locator(".invoice-upload .error-message")
-
-    @property
-    def anomalies_list(self):
-        return self.page.locator(".anomaly-item")
+    def snapshot_state(self) -> dict:
+        """Count, visibility and text of the first match for each of STATE_SELECTORS, in one round trip."""
+        return _snapshot_state(self.page, self.STATE_SELECTORS)
 
 
 class ReactDetailPage:
     """Invoice detail page - React InvoiceDetail component."""
 
-    def __init__(self, page: Page, base_url: str = "http://localhost:8000"):
+    # CSS selectors read by snapshot_state (same elements as the locator properties below)
+    STATE_SELECTORS = {
+        "risk_score": ".risk-badge-large",
+        "explanation": ".invoice-detail .explanation-box p",
+        "submit_button": "button[title='Submit to ERPNext']",
+        "submitted_status": ".submitted-status",
+        "erpnext_name": ".erpnext-name",
+    }
+
+    def __init__(self, page: "Page", base_url: str = "http://localhost:8000"):
         self.page = page
         self.base_url = base_url.rstrip("/")
+        # Detail-page elements are looked up inside this root
+        self.root = page.locator(".invoice-detail")
 
     def navigate(self, invoice_id: str):
-        self.page.goto(f"{self.base_url}/invoices/{invoice_id}", wait_until="load")
+        self.page.goto(f"{self.base_url}/invoices/{invoice_id}", wait_until="domcontentloaded")
 
     def wait_for_content(self, timeout: int = 10000):
-        self.page.locator(".invoice-detail .invoice-card").wait_for(state="visible", timeout=timeout)
+        self.root.locator(".invoice-card").wait_for(state="visible", timeout=timeout)
+
+    def ensure_open(self, invoice_id: str, timeout: int = 15000):
+        """Navigate to the invoice unless the page is already showing it, then wait for content."""
+        if not self.page.url.rstrip("/").endswith(f"/invoices/{invoice_id}"):
+            self.navigate(invoice_id)
+        self.wait_for_content(timeout=timeout)
+
+    def snapshot_state(self) -> dict:
+        """Count, visibility and text of the first match for each of STATE_SELECTORS, in one round trip."""
+        return _snapshot_state(self.page, self.STATE_SELECTORS)
 
     @property
     def submit_to_erpnext_button(self):
         """Match button with emoji or plain text (e.g. '📤 Submit to ERPNext')."""
-        return self.page.get_by_role("button", name=re.compile(r"Submit to ERPNext"))
+        return self.page.get_by_role("button", name=_SUBMIT_TO_ERPNEXT_RE)
+
+    def click_submit(self, timeout: int = 15000):
+        """Click Submit to ERPNext, accept its confirm dialog and return the submit-to-erpnext API response.
+
+        The handler is one-shot, so the success alert afterwards is auto-dismissed by Playwright.
+        """
+        self.page.once("dialog", lambda dialog: dialog.accept())
+        with self.page.expect_response(lambda r: "/submit-to-erpnext" in r.url, timeout=timeout) as info:
+            self.submit_to_erpnext_button.first.click()
+        return info.value
 
     @property
     def submitted_status(self):
@@ -118,7 +171,7 @@ class ReactDetailPage:
     @property
     def explanation_text(self):
         """Explanation on detail page (scoped to .invoice-detail for fixture)."""
-        return self.page.locator(".invoice-detail .explanation-box p")
+        return self.root.locator(".explanation-box p")
 
     @property
     def risk_score_display(self):
@@ -130,19 +183,24 @@ class ReactDetailPage:
 
     @property
     def detail_error_message(self):
-        return self.page.locator(".invoice-detail .error-message")
+        return self.root.locator(".error-message")
 
 
 class ReactListPage:
     """All Invoices list page."""
 
-    def __init__(self, page: Page, base_url: str = "http://localhost:8000"):
+    def __init__(self, page: "Page", base_url: str = "http://localhost:8000"):
         self.page = page
         self.base_url = base_url.rstrip("/")
 
-    def navigate(self):
-        self.page.goto(f"{self.base_url}/invoices")
-        self.page.wait_for_load_state("networkidle")
+    def navigate(self, timeout: int = 15000):
+        self.page.goto(f"{self.base_url}/invoices", wait_until="domcontentloaded")
+        # Done once the list has settled: table, empty state or load error (not the spinner)
+        expect(self.loaded_state.first).to_be_visible(timeout=timeout)
+
+    @property
+    def loaded_state(self):
+        return self.page.locator(".invoices-table, .empty-state, .invoice-list .error-message")
 
     @property
     def invoice_links(self):
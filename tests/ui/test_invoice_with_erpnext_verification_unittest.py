@@ -6,43 +6,58 @@ Run: BASE_URL=http://localhost:3000 python -m unittest tests.ui.test_invoice_wit
 import re
 import unittest
 
-from tests.ui.unittest_playwright import PlaywrightTestCase
+from tests.ui.unittest_playwright import PlaywrightTestCase, expect
 from tests.ui.pages.react_app_pages import ReactDetailPage
 
 INVOICE_ID = "f0457287-14f0-4055-a401-047c5356fc4e"
 
 
-class TestInvoiceDetailWithErpnextVerification(PlaywrightTestCase):
-    """Invoice detail page load, risk display, and ERPNext submission."""
+class TestInvoiceDetailReadOnly(PlaywrightTestCase):
+    """Invoice detail page load and risk display (no state changes)."""
+
+    # All tests open the same invoice, so it is loaded once per class
+    share_page = True
 
     def test_invoice_detail_page_loads_and_shows_risk(self):
         """Invoice detail page loads and displays risk information."""
         detail_page = ReactDetailPage(self.page, base_url=self.base_url)
-        page = self.page
-
-        detail_page.navigate(INVOICE_ID)
-        detail_page.wait_for_content(timeout=15000)
 
-        page.locator(".invoice-detail").wait_for(state="visible", timeout=5000)
-        self.assertTrue(page.locator(".invoice-detail").is_visible())
+        detail_page.ensure_open(INVOICE_ID)
 
         risk_score = detail_page.risk_score_display
         self.assertGreater(risk_score.count(), 0, "Risk score not found on page")
-        risk_score.first.wait_for(state="visible", timeout=5000)
-        self.assertTrue(risk_score.first.is_visible())
+        expect(risk_score.first).to_be_visible()
 
         explanation = detail_page.explanation_text
         self.assertGreater(explanation.count(), 0, "Risk explanation not found on page")
-        explanation.first.wait_for(state="visible", timeout=5000)
-        self.assertTrue(explanation.first.is_visible())
+        expect(explanation.first).to_be_visible()
+
+    def test_full_user_journey_with_erpnext(self):
+        """Complete user journey: view invoice, check risk, check submission status."""
+        detail_page = ReactDetailPage(self.page, base_url=self.base_url)
+
+        detail_page.ensure_open(INVOICE_ID)
+
+        state = detail_page.snapshot_state()
+        if state["risk_score"]["count"]:
+            self.assertTrue(state["risk_score"]["visible"])
+        if state["explanation"]["count"]:
+            self.assertTrue(state["explanation"]["visible"])
+
+        if state["submitted_status"]["visible"]:
+            self.assertIn("Submitted", state["submitted_status"]["text"])
+        elif state["submit_button"]["count"]:
+            self.assertTrue(state["submit_button"]["visible"])
+
+
+class TestInvoiceDetailSubmit(PlaywrightTestCase):
+    """ERPNext submission; kept apart from the read-only class because it changes the invoice."""
 
     def test_submit_to_erpnext_and_verify_comment(self):
         """Submit invoice to ERPNext and verify submission (comment verification noted)."""
         detail_page = ReactDetailPage(self.page, base_url=self.base_url)
-        page = self.page
 
-        detail_page.navigate(INVOICE_ID)
-        detail_page.wait_for_content(timeout=15000)
+        detail_page.ensure_open(INVOICE_ID)
 
         explanation = detail_page.explanation_text
         self.assertGreater(explanation.count(), 0, "Risk explanation not found")
@@ -51,23 +66,18 @@ class TestInvoiceDetailWithErpnextVerification(PlaywrightTestCase):
         submitted_status = detail_page.submitted_status
         erpnext_invoice_name = None
 
-        if submitted_status.count() > 0 and submitted_status.first.is_visible():
+        if self._maybe_visible(submitted_status):
             erpnext_name_elem = detail_page.erpnext_invoice_name
-            if erpnext_name_elem.count() > 0:
+            if self._maybe_visible(erpnext_name_elem):
                 erpnext_invoice_name = erpnext_name_elem.first.text_content()
         else:
             submit_btn = detail_page.submit_to_erpnext_button
             self.assertGreater(submit_btn.count(), 0, "Submit button not found")
-            submit_btn.first.wait_for(state="visible", timeout=5000)
-            self.assertTrue(submit_btn.first.is_visible())
+            expect(submit_btn.first).to_be_visible()
 
-            def handle_dialogs(dialog):
-                dialog.accept()
-            page.on("dialog", handle_dialogs)
-
-            submit_btn.first.click()
-            detail_page.submitted_status.wait_for(state="visible", timeout=15000)
-            self.assertIn("Submitted to ERPNext", detail_page.submitted_status.text_content() or "")
+            response = detail_page.click_submit()
+            self.assertTrue(response.ok, f"Submit failed: {response.status} {response.text()}")
+            expect(detail_page.submitted_status).to_contain_text("Submitted to ERPNext")
 
             erpnext_name_elem = detail_page.erpnext_invoice_name
             self.assertGreater(erpnext_name_elem.count(), 0, "ERPNext invoice name not found after submission")
@@ -75,30 +85,6 @@ class TestInvoiceDetailWithErpnextVerification(PlaywrightTestCase):
 
         self.assertIsNotNone(erpnext_invoice_name, "Could not determine ERPNext invoice name")
 
-    def test_full_user_journey_with_erpnext(self):
-        """Complete user journey: view invoice, check risk, check submission status."""
-        detail_page = ReactDetailPage(self.page, base_url=self.base_url)
-        page = self.page
-
-        detail_page.navigate(INVOICE_ID)
-        detail_page.wait_for_content(timeout=15000)
-        page.locator(".invoice-detail").wait_for(state="visible", timeout=5000)
-        self.assertTrue(page.locator(".invoice-detail").is_visible())
-
-        risk_score = detail_page.risk_score_display
-        explanation = detail_page.explanation_text
-        if risk_score.count() > 0:
-            self.assertTrue(risk_score.first.is_visible())
-        if explanation.count() > 0:
-            self.assertTrue(explanation.first.is_visible())
-
-        submitted_status = detail_page.submitted_status
-        submit_btn = detail_page.submit_to_erpnext_button
-        if submitted_status.count() > 0 and submitted_status.first.is_visible():
-            self.assertIn("Submitted", (submitted_status.first.text_content() or ""))
-        elif submit_btn.count() > 0:
-            self.assertTrue(submit_btn.first.is_visible())
-
 
 if __name__ == "__main__":
     unittest.main()
@@ -7,9 +7,14 @@ import re
 import unittest
 from pathlib import Path
 
-from tests.ui.unittest_playwright import PlaywrightTestCase
+from tests.ui.unittest_playwright import PlaywrightTestCase, expect
 from tests.ui.pages.react_app_pages import ReactUploadPage, ReactDetailPage
 
+# URL of an invoice detail page, reached via "View Details"
+_INVOICE_DETAIL_RE = re.compile(r".*/invoices/[^/]+$")
+# Any non-whitespace text
+_NON_BLANK_RE = re.compile(r"\S")
+
 
 def _project_root():
     return Path(__file__).resolve().parent.parent.parent
@@ -35,32 +40,26 @@ class TestUserJourneyUploadViewRiskAndSubmit(PlaywrightTestCase):
         upload_page.upload_file(sample_pdf)
         upload_page.wait_for_results()
 
-        upload_page.result_card.wait_for(state="visible", timeout=15000)
-        self.assertTrue(upload_page.result_card.is_visible())
-        risk_text = upload_page.risk_score_text.text_content() or ""
-        self.assertIn("Risk Score", risk_text)
-        self.assertTrue(upload_page.vendor_name.is_visible(), "Vendor name should be visible")
-        self.assertTrue(upload_page.explanation_box.count() > 0, "Risk explanation should be visible")
+        # wait_for_results has already waited for the result card; the rest render with it,
+        # so one snapshot covers the risk, vendor and explanation checks
+        state = upload_page.snapshot_state()
+        self.assertIn("Risk Score", state["risk_score"]["text"])
+        self.assertTrue(state["vendor_name"]["visible"], "Vendor name should be visible")
+        self.assertGreater(state["explanation"]["count"], 0, "Risk explanation should be visible")
 
         upload_page.view_details_button.click()
-        page.wait_for_url(re.compile(r".*/invoices/[^/]+$"), timeout=15000)
+        page.wait_for_url(_INVOICE_DETAIL_RE, timeout=15000)
 
         detail_page.wait_for_content()
 
-        def accept_dialogs(dialog):
-            dialog.accept()
-        page.on("dialog", accept_dialogs)
-
         submit_btn = detail_page.submit_to_erpnext_button
-        submit_btn.wait_for(state="visible", timeout=5000)
-        submit_btn.click()
-
-        detail_page.submitted_status.wait_for(state="visible", timeout=15000)
-        self.assertTrue(detail_page.submitted_status.is_visible())
-        self.assertIn("Submitted to ERPNext", detail_page.submitted_status.text_content() or "")
-        detail_page.erpnext_invoice_name.wait_for(state="visible", timeout=5000)
-        self.assertTrue(detail_page.explanation_text.count() > 0)
-        self.assertTrue((detail_page.explanation_text.text_content() or "").strip() != "")
+        expect(submit_btn).to_be_visible()
+        response = detail_page.click_submit()
+        self.assertTrue(response.ok, f"Submit failed: {response.status} {response.text()}")
+
+        expect(detail_page.submitted_status).to_contain_text("Submitted to ERPNext")
+        expect(detail_page.erpnext_invoice_name).to_be_visible()
+        expect(detail_page.explanation_text.first).to_have_text(_NON_BLANK_RE)
 
 
 if __name__ == "__main__":
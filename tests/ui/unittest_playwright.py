@@ -2,13 +2,28 @@
 Base TestCase for UI tests using unittest + Playwright.
 Real integration only: no mocks. Use BASE_URL for the app URL or defaults to http://localhost:3000.
 """
+import atexit
 import os
+import re
 import unittest
+from functools import lru_cache
 
-try:
-    from playwright.sync_api import sync_playwright
-except ImportError:
-    sync_playwright = None
+
+# Playwright is imported on first use, so collecting the wider test suite doesn't load it
+@lru_cache(maxsize=1)
+def _sync_playwright():
+    """playwright.sync_api.sync_playwright, or None if Playwright is not installed."""
+    try:
+        from playwright.sync_api import sync_playwright
+    except ImportError:
+        return None
+    return sync_playwright
+
+
+def expect(*args, **kwargs):
+    """playwright.sync_api.expect, imported on first call."""
+    from playwright.sync_api import expect as playwright_expect
+    return playwright_expect(*args, **kwargs)
 
 
 def _get_base_url():
@@ -19,56 +34,146 @@ def _get_base_url():
     return "http://localhost:3000"
 
 
+# Images and fonts are never asserted on, so UI tests don't download them (CSS still loads,
+# since visibility checks depend on it)
+_STATIC_ASSET_RE = re.compile(r".*\.(png|jpe?g|gif|svg|ico|woff2?|ttf)(\?.*)?$")
+
+# Per-action / navigation budgets; failures surface fast instead of after Playwright's 30s default.
+# Explicit timeout= on backend-bound waits (upload parsing, ERPNext submit) still override these.
+DEFAULT_TIMEOUT_MS = int(os.environ.get("PLAYWRIGHT_DEFAULT_TIMEOUT", 5000))
+NAVIGATION_TIMEOUT_MS = int(os.environ.get("PLAYWRIGHT_DEFAULT_NAVIGATION_TIMEOUT", 10000))
+
+# PW_TRACE=1 records a Playwright trace per test; it is written to TRACE_DIR only when the test fails
+TRACE_ENABLED = os.environ.get("PW_TRACE") == "1"
+TRACE_DIR = os.environ.get("PW_TRACE_DIR", "test-results/traces")
+
+_playwright = None
+_browsers = {}  # headless flag -> Browser, shared by every test in the run
+
+
+def _get_playwright():
+    global _playwright
+    if _playwright is None:
+        _playwright = _sync_playwright()().start()
+        atexit.register(_stop_playwright)
+    return _playwright
+
+
+def _get_browser(headless):
+    """Return the run-wide Chromium for this headless mode, launching it on first use."""
+    if headless not in _browsers:
+        _browsers[headless] = _get_playwright().chromium.launch(headless=headless)
+    return _browsers[headless]
+
+
+def _configure_context(context):
+    """Apply the shared timeouts, asset blocking and (PW_TRACE) tracing to a new context."""
+    context.set_default_timeout(DEFAULT_TIMEOUT_MS)
+    context.set_default_navigation_timeout(NAVIGATION_TIMEOUT_MS)
+    # Note: enabling routing turns off Playwright's HTTP cache for the whole context, so nothing
+    # (bundle included) is served from cache; don't rely on caching across pages of this context
+    context.route(_STATIC_ASSET_RE, lambda route: route.abort())
+    if TRACE_ENABLED:
+        context.tracing.start(screenshots=False, snapshots=False, sources=False)
+
+
+def _stop_playwright():
+    global _playwright
+    _close_quietly(*_browsers.values())
+    _browsers.clear()
+    if _playwright is not None:
+        try:
+            _playwright.stop()
+        except Exception:
+            pass
+        _playwright = None
+
+
+def _close_quietly(*handles):
+    """Close Playwright page/context/browser handles in order, ignoring errors."""
+    for handle in handles:
+        if handle is None:
+            continue
+        try:
+            handle.close()
+        except Exception:
+            pass
+
+
 class PlaywrightTestCase(unittest.TestCase):
     """
     Base class for UI tests. Real app only (no fixture/mock server).
-    setUp: starts Playwright browser/context/page. tearDown: closes them.
+    The Chromium process is shared by the whole run and each class gets one browser
+    context; each test gets its own page (setUp/tearDown). With share_page = True the
+    page is created once in setUpClass instead, so tests in the class see the page state
+    (URL, DOM) left by the previous test.
     """
 
-    def setUp(self):
-        super().setUp()
-        if sync_playwright is None:
-            self.skipTest("Playwright not installed")
-        self._pw = sync_playwright().start()
+    share_page = False
+
+    @classmethod
+    def _headless(cls):
         # Headless=False only for test_user_journey_unittest.py; headless=True for all other UI tests.
         # In CI, always headless.
         if os.environ.get("CI") == "true":
-            headless = True
+            return True
+        return "test_user_journey_unittest" not in cls.__module__
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls._context = cls._shared_page = None
+        if _sync_playwright() is not None:
+            cls._context = _get_browser(cls._headless()).new_context()
+            _configure_context(cls._context)
+            if cls.share_page:
+                cls._shared_page = cls._context.new_page()
+
+    @classmethod
+    def tearDownClass(cls):
+        _close_quietly(cls._shared_page, cls._context)
+        cls._context = cls._shared_page = None
+        super().tearDownClass()
+
+    def setUp(self):
+        super().setUp()
+        if _sync_playwright() is None:
+            self.skipTest("Playwright not installed")
+        if self.share_page:
+            self._page = self._shared_page
         else:
-            module = self.__class__.__module__
-            headless = "test_user_journey_unittest" not in module
-        self._browser = self._pw.chromium.launch(headless=headless)
-        self._context = self._browser.new_context()
-        self._page = self._context.new_page()
+            # The class context saves creating and configuring (timeouts, route, tracing) one per
+            # test; the app keeps no localStorage, so clearing cookies is enough to isolate tests
+            self._context.clear_cookies()
+            self._page = self._context.new_page()
+        if TRACE_ENABLED:
+            self._context.tracing.start_chunk()
         self.base_url = _get_base_url()
 
     def tearDown(self):
-        if getattr(self, "_page", None):
-            try:
-                self._page.close()
-            except Exception:
-                pass
-        if getattr(self, "_context", None):
-            try:
-                self._context.close()
-            except Exception:
-                pass
-        if getattr(self, "_browser", None):
-            try:
-                self._browser.close()
-            except Exception:
-                pass
-        if getattr(self, "_pw", None):
-            try:
-                self._pw.stop()
-            except Exception:
-                pass
+        if TRACE_ENABLED:
+            self._stop_trace_chunk()
+        if not self.share_page:
+            _close_quietly(self._page)
         super().tearDown()
 
+    def _stop_trace_chunk(self):
+        """End this test's trace chunk: saved under TRACE_DIR if the test failed, else discarded."""
+        if self._outcome.success:
+            self._context.tracing.stop_chunk()
+            return
+        os.makedirs(TRACE_DIR, exist_ok=True)
+        self._context.tracing.stop_chunk(path=os.path.join(TRACE_DIR, f"{self.id()}.zip"))
 
     @property
     def page(self):
         return self._page
 
-
-
+    @staticmethod
+    def _maybe_visible(locator, timeout=1000):
+        """True if the first match of locator is visible within timeout (ms), else False."""
+        try:
+            expect(locator.first).to_be_visible(timeout=timeout)
+            return True
+        except AssertionError:
+            return False
@@ -1,41 +1,98 @@
 """Quick script to upload sample invoices from JSON files."""
 import requests
+import hashlib
 import json
 import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
 from pathlib import Path
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 BASE_URL = "http://localhost:8000/api"
 SAMPLE_DIR = Path("sample_invoices")
+# SHA-256 of each uploaded JSON file -> invoice id, so unchanged files aren't uploaded again
+UPLOAD_CACHE_PATH = Path(".upload_cache.json")
+JSON_HEADERS = {"Content-Type": "application/json"}
 
-def upload_invoice_file(file_path):
-    """Upload an invoice from a JSON file."""
+UPLOAD_WORKERS = 8
+# Seconds to wait on any backend call, so a hung server can't block an upload thread forever
+REQUEST_TIMEOUT = 10
+
+# One keep-alive connection pool for the health check and every upload (shared by the upload threads).
+# Retries with backoff ride out a backend that is still warming up.
+session = requests.Session()
+session.mount("http://", HTTPAdapter(
+    pool_connections=1,
+    pool_maxsize=16,
+    max_retries=Retry(total=3, backoff_factor=0.2, status_forcelist=[502, 503, 504]),
+))
+
+def load_upload_cache():
+    """Return the digest -> invoice id map from earlier runs (empty if missing or unreadable)."""
     try:
-        with open(file_path, 'r') as f:
-            invoice_data = json.load(f)
-        
-        response = requests.post(f"{BASE_URL}/invoices/create", json=invoice_data)
-        response.raise_for_status()
-        invoice = response.json()
-        
-        print(f"✓ Uploaded: {file_path.name}")
-        print(f"  Invoice #: {invoice['parsed_data']['invoice_number']}")
-        print(f"  Amount: ${invoice['parsed_data']['total_amount']:.2f}")
+        return json.loads(UPLOAD_CACHE_PATH.read_text())
+    except (OSError, ValueError):
+        return {}
+
+def save_upload_cache(cache):
+    UPLOAD_CACHE_PATH.write_text(json.dumps(cache, indent=2, sort_keys=True))
+
+def _cached_invoice(cache, digest):
+    """Invoice previously uploaded from identical file contents, if the backend still has it."""
+    invoice_id = cache.get(digest)
+    if not invoice_id:
+        return None
+    response = session.get(f"{BASE_URL}/invoices/{invoice_id}", timeout=REQUEST_TIMEOUT)
+    return response.json() if response.status_code == 200 else None
+
+def upload_invoice_file(file_path, out=None, cache=None):
+    """Upload an invoice from a JSON file.
+
+    Progress lines are appended to out if given (for uploads running in threads), else printed.
+    With a cache (see load_upload_cache), files whose contents were already uploaded are skipped
+    as long as the backend still has that invoice.
+    """
+    log = print if out is None else out.append
+    try:
+        raw = Path(file_path).read_bytes()
+        digest = hashlib.sha256(raw).hexdigest()
+        invoice = _cached_invoice(cache, digest) if cache is not None else None
+        if invoice is not None:
+            log(f"✓ Already uploaded: {file_path.name}")
+        else:
+            # The file already is the request body; send its bytes as-is instead of parsing and re-encoding
+            response = session.post(
+                f"{BASE_URL}/invoices/create", data=raw, headers=JSON_HEADERS, timeout=REQUEST_TIMEOUT
+            )
+            response.raise_for_status()
+            invoice = response.json()
+            if cache is not None:
+                cache[digest] = invoice["id"]
+            log(f"✓ Uploaded: {file_path.name}")
+        log(f"  Invoice #: {invoice['parsed_data']['invoice_number']}")
+        log(f"  Amount: ${invoice['parsed_data']['total_amount']:.2f}")
         
         return invoice
     except Exception as e:
-        print(f"✗ Error uploading {file_path.name}: {e}")
+        log(f"✗ Error uploading {file_path.name}: {e}")
         return None
 
 def analyze_invoice(invoice_id):
     """Analyze an invoice."""
     try:
-        response = requests.post(f"{BASE_URL}/invoices/{invoice_id}/analyze")
+        response = session.post(f"{BASE_URL}/invoices/{invoice_id}/analyze", timeout=REQUEST_TIMEOUT)
         response.raise_for_status()
         return response.json()
     except Exception as e:
         print(f"✗ Error analyzing: {e}")
         return None
 
+def _write_lines(lines):
+    """Write a block of progress lines to stdout with a single write call."""
+    sys.stdout.write("".join(f"{line}\n" for line in lines))
+
 def main():
     """Upload all sample invoices."""
     print("=" * 60)
@@ -45,12 +102,12 @@ def main():
     
     # Check if server is running
     try:
-        response = requests.get(f"{BASE_URL.replace('/api', '')}/health", timeout=2)
+        response = session.get(f"{BASE_URL.replace('/api', '')}/health", timeout=2)
         if response.status_code != 200:
             print("⚠️  Backend server is not running!")
             print("Please start the server first: python run.py")
             return
-    except:
+    except requests.RequestException:
         print("⚠️  Backend server is not running!")
         print("Please start the server first: python run.py")
         return
@@ -65,25 +122,31 @@ def main():
     print(f"Found {len(json_files)} invoice file(s)\n")
     
     invoices = []
+    cache = load_upload_cache()
     
-    # Upload normal invoices first (1-5)
-    normal_files = [f for f in json_files if "ANOMALOUS" not in f.name]
-    anomalous_files = [f for f in json_files if "ANOMALOUS" in f.name]
+    # Upload normal invoices first (1-5); json_files is sorted, so both lists stay in file order
+    normal_files, anomalous_files = [], []
+    for f in json_files:
+        (anomalous_files if "ANOMALOUS" in f.name else normal_files).append(f)
     
     print("📄 Uploading Normal Invoices...")
     print("-" * 60)
-    for file_path in sorted(normal_files):
-        invoice = upload_invoice_file(file_path)
-        if invoice:
-            invoices.append(invoice)
-        print()
+    # Normal uploads are independent, so run them concurrently; output is written in file order
+    outputs = [[] for _ in normal_files]
+    with ThreadPoolExecutor(max_workers=UPLOAD_WORKERS) as executor:
+        for invoice, lines in zip(executor.map(partial(upload_invoice_file, cache=cache), normal_files, outputs), outputs):
+            _write_lines([*lines, ""])
+            if invoice:
+                invoices.append(invoice)
     
     # Upload anomalous invoice last
     if anomalous_files:
         print("⚠️  Uploading Anomalous Invoice...")
         print("-" * 60)
         for file_path in anomalous_files:
-            invoice = upload_invoice_file(file_path)
+            lines = []
+            invoice = upload_invoice_file(file_path, lines, cache=cache)
+            _write_lines(lines)
             if invoice:
                 invoices.append(invoice)
                 print()
@@ -102,6 +165,8 @@ def main():
                             print(f"   - {anomaly['type'].replace('_', ' ').title()}: {anomaly['description']}")
                 print()
     
+    save_upload_cache(cache)
+    
     print("=" * 60)
     print(f"✅ Successfully uploaded {len(invoices)} invoice(s)")
     print("=" * 60)